@@ -0,0 +1,91 @@
+# Minimal stand-in for the QuestDB REST /exec endpoint, used to benchmark
+# validate_queries.py offline without a running QuestDB instance:
+#     python scripts/questdb_stub_server.py --port 9100
+#     python scripts/validate_queries.py --url http://localhost:9100 --profile
+#
+# Every query succeeds and returns the same synthetic result set, shaped like
+# a real /exec response including `timings`. Use --rows to control the payload
+# size and --delay-ms to simulate server-side execution time.
+# Queries starting with "FAIL" return an error, to exercise the failure path.
+# Like QuestDB, the stub speaks HTTP/1.1 and keeps connections alive, so the
+# harness reuses its pooled connection instead of reconnecting per query.
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+parser = argparse.ArgumentParser(description="Serve a stub QuestDB /exec endpoint for offline benchmarking.")
+parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+parser.add_argument("--port", default=9100, type=int, help="Port to listen on (default: 9100)")
+parser.add_argument("--rows", default=100, type=int, help="Rows returned per query (default: 100)")
+parser.add_argument("--delay-ms", default=0.0, type=float, help="Simulated execution time per query (default: 0)")
+args = parser.parse_args()
+
+COLUMNS = [
+    {"name": "timestamp", "type": "TIMESTAMP"},
+    {"name": "symbol", "type": "SYMBOL"},
+    {"name": "price", "type": "DOUBLE"},
+    {"name": "amount", "type": "LONG"},
+]
+DATASET = [
+    [f"2025-01-01T00:00:{i % 60:02d}.000000Z", f"SYM-{i % 10}", 100.0 + i / 100, i]
+    for i in range(args.rows)
+]
+
+
+class ExecHandler(BaseHTTPRequestHandler):
+    # Every reply sends Content-Length, so connections can persist between queries.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != "/exec":
+            self.reply(404, {"error": f"Not found: {parsed.path}"})
+            return
+
+        query = parse_qs(parsed.query).get("query", [""])[0]
+        if not query.strip():
+            self.reply(400, {"error": "empty query", "position": 0})
+            return
+        if query.lstrip().upper().startswith("FAIL"):
+            self.reply(400, {"query": query, "error": "stub failure", "position": 0})
+            return
+
+        start = time.perf_counter_ns()
+        if args.delay_ms:
+            time.sleep(args.delay_ms / 1000)
+        execute_ns = time.perf_counter_ns() - start
+
+        self.reply(200, {
+            "query": query,
+            "columns": COLUMNS,
+            "timestamp": 0,
+            "dataset": DATASET,
+            "count": len(DATASET),
+            "timings": {"authentication": 0, "compiler": 0, "execute": execute_ns, "count": 0},
+        })
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *log_args):
+        pass
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer((args.host, args.port), ExecHandler)
+    print(f"Stub QuestDB /exec listening on http://{args.host}:{args.port}/exec "
+          f"({args.rows} rows, {args.delay_ms} ms delay)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
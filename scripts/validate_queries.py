@@ -15,6 +15,15 @@
 #     https://questdb.com/dashboards/fx-orderbook/
 #     https://questdb.com/dashboards/crypto/
 #
+# Queries run over the REST API (/exec) by default. Use --backend to pick the
+# PostgreSQL wire protocol instead, or both side by side:
+#   --backend rest            (HTTP /exec, default)
+#   --backend pgwire          (PGWire, server-side prepared statements, binary results)
+#   --backend both            (run every query on REST and PGWire and compare)
+# PGWire needs the psycopg package (pip install "psycopg[binary]") and connects
+# with --pg-host/--pg-port/--pg-user/--pg-password/--pg-database
+# (default: localhost:8812, admin/quest, qdb).
+#
 # It reports execution times for each query.
 # Queries taking more than 1 second appear in yellow.
 # Queries taking more than 2.5 seconds appear in orange.
@@ -32,14 +41,45 @@
 #   • all_queries.sql            → all executed queries
 #   • failed_queries.sql         → only the queries that failed
 #   • query_validation_report.txt → final summary (failures and slow queries)
+#
+# Use --profile to see where the harness itself spends its time. It records
+# wall and CPU time per stage (local scan, remote fetches, HTTP round trips,
+# JSON parsing, report writing) and per query, and splits each REST round trip
+# into the time reported by the server `timings` and the remaining client
+# overhead. PGWire reports no server timings, so it is left out of that split.
+# The breakdown is printed and written to query_profile.txt.
+# Add --profile-output run.prof to also dump cProfile stats, which can be
+# viewed with snakeviz or turned into a flamegraph with flameprof.
+#
+# Use --fingerprint yes to reduce each result set to a compact fingerprint once
+# it has been fetched: row count, column types, and an order-aware and an
+# order-insensitive hash of the rows. Only the fingerprint is kept, not the
+# rows. Hashing happens after the round trip is timed, and only for the first
+# backend. Fingerprints are written to query_fingerprints.json. Pass a previous
+# run's file with
+#     --baseline-fingerprints old_fingerprints.json
+# to flag queries whose results changed, e.g. after a QuestDB upgrade or when
+# comparing two instances. REST and PGWire encode values differently, so a
+# baseline recorded with another backend is rejected.
+#
+# To benchmark the harness offline, start the stub /exec server and point
+# --url at it:
+#     python scripts/questdb_stub_server.py --port 9100
+#     python scripts/validate_queries.py --url http://localhost:9100 --profile
 
 import re
 import requests
 from pathlib import Path
 import sys
 import json
+import time
 import argparse
 import html
+import hashlib
+import threading
+import cProfile
+from collections import namedtuple
+from contextlib import contextmanager
 from urllib.parse import urlparse, parse_qs, unquote
 
 # ---------------- Argument parsing ----------------
@@ -51,14 +91,26 @@ parser.add_argument("--url", default="http://localhost:9000", help="QuestDB REST
 parser.add_argument("--process-local", default="yes", choices=["yes", "no"], help="Whether to process local markdown files (default: yes)")
 parser.add_argument("--process-demo", default="yes", choices=["yes", "no"], help="Whether to process demo queries from the live console JSON (default: yes)")
 parser.add_argument("--process-dashboards", default="yes", choices=["yes", "no"], help="Whether to process dashboard queries (default: yes)")
+parser.add_argument("--backend", default="rest", choices=["rest", "pgwire", "both"], help="Protocol used to execute queries (default: rest)")
+parser.add_argument("--pg-host", default="localhost", help="QuestDB PGWire host (default: localhost)")
+parser.add_argument("--pg-port", default=8812, type=int, help="QuestDB PGWire port (default: 8812)")
+parser.add_argument("--pg-user", default="admin", help="QuestDB PGWire user (default: admin)")
+parser.add_argument("--pg-password", default="quest", help="QuestDB PGWire password (default: quest)")
+parser.add_argument("--pg-database", default="qdb", help="QuestDB PGWire database (default: qdb)")
+parser.add_argument("--fingerprint", default="no", choices=["yes", "no"], help="Whether to fingerprint result sets (default: no)")
+parser.add_argument("--baseline-fingerprints", help="Fingerprint file from a previous run to compare against (implies --fingerprint yes)")
+parser.add_argument("--profile", action="store_true", help="Record wall and CPU time per harness stage and per query")
+parser.add_argument("--profile-output", help="Also dump cProfile stats to this file (implies --profile)")
 args = parser.parse_args()
 
 # ---------------- Configuration ----------------
-QUESTDB_REST_URL = f"{args.url.rstrip('/')}/exec"
 ROOT_DIR = args.path
 ALL_FILE = Path("all_queries.sql")
 FAILED_FILE = Path("failed_queries.sql")
 REPORT_FILE = Path("query_validation_report.txt")
+PROFILE_FILE = Path("query_profile.txt")
+FINGERPRINT_FILE = Path("query_fingerprints.json")
+FINGERPRINT = args.fingerprint == "yes" or bool(args.baseline_fingerprints)
 TIMEOUT = (3, 60)
 DEMO_URL = "https://demo.questdb.io/assets/console-configuration.json"
 DASHBOARD_URLS = [
@@ -74,6 +126,83 @@ RESET = "\033[0m"
 block_re = re.compile(r"```questdb-sql[^\n]*title=\"([^\"]+)\"[^\n]*\bdemo\b[^\n]*\n(.*?)```", re.DOTALL)
 href_re = re.compile(r'href="https://demo\.questdb\.io\?query=([^"]+)"')
 
+# ---------------- Profiling ----------------
+class Profiler:
+    """Accumulate wall and CPU time per harness stage and per query."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.stages = {}    # name -> [calls, wall_ns, cpu_ns]
+        self.queries = []   # [path, title, wall_ns, cpu_ns, server_ns or None, rest_wall_ns]
+        self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter_ns(), time.process_time_ns()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += time.perf_counter_ns() - wall
+            totals[2] += time.process_time_ns() - cpu
+
+    @contextmanager
+    def query(self, path, title):
+        if not self.enabled:
+            yield
+            return
+        self.current = record = [path, title, 0, 0, None, 0]
+        wall, cpu = time.perf_counter_ns(), time.process_time_ns()
+        try:
+            yield
+        finally:
+            record[2] = time.perf_counter_ns() - wall
+            record[3] = time.process_time_ns() - cpu
+            self.queries.append(record)
+            self.current = None
+
+    def add_server_time(self, timings, wall_ns):
+        """Attribute the server-reported `timings` and the REST round trip they
+        belong to (both nanoseconds) to the current query."""
+        if self.current is None or not isinstance(timings, dict):
+            return
+        server_ns = sum(v for v in timings.values() if isinstance(v, (int, float)))
+        self.current[4] = (self.current[4] or 0) + server_ns
+        self.current[5] += wall_ns
+
+    def summary_lines(self):
+        lines = ["⏱  Harness profile (wall / CPU):"]
+        for name, (calls, wall_ns, cpu_ns) in self.stages.items():
+            lines.append(f"  {name:<18} {calls:>6} calls  {wall_ns / 1e6:>12.3f} ms  {cpu_ns / 1e6:>12.3f} ms")
+
+        wall_total = sum(q[2] for q in self.queries)
+        server_total = sum(q[4] for q in self.queries if q[4] is not None)
+        rest_wall_total = sum(q[5] for q in self.queries if q[4] is not None)
+        lines.append("")
+        lines.append(f"  Queries:          {len(self.queries)}, {wall_total / 1e6:.3f} ms wall")
+        lines.append(f"  REST round trips: {rest_wall_total / 1e6:.3f} ms")
+        lines.append(f"  Server timings:   {server_total / 1e6:.3f} ms")
+        lines.append(f"  Client overhead:  {(rest_wall_total - server_total) / 1e6:.3f} ms"
+                     " (REST round trips minus server timings; PGWire reports no timings)")
+        return lines
+
+    def query_lines(self):
+        lines = ["  Per query, slowest first (wall / CPU / REST server / REST client):"]
+        for path, title, wall_ns, cpu_ns, server_ns, rest_wall_ns in sorted(self.queries, key=lambda q: q[2], reverse=True):
+            if server_ns is not None:
+                split = f"{server_ns / 1e6:.3f} ms / {(rest_wall_ns - server_ns) / 1e6:.3f} ms"
+            else:
+                split = "n/a / n/a"
+            lines.append(f"  - {path}  [{title}] {wall_ns / 1e6:.3f} ms / {cpu_ns / 1e6:.3f} ms / {split}")
+        return lines
+
+
+PROFILER = Profiler(args.profile or bool(args.profile_output))
+
 # ---------------- Data extraction ----------------
 def extract_local_blocks(root_dir):
     root = Path(root_dir)
@@ -176,43 +305,248 @@ def extract_dashboard_queries():
             yield url, title, sql
 
 
-# ---------------- Query execution ----------------
-def execute_query(query):
-    """Execute the query via GET, reading full response and parsing timings."""
+# ---------------- Fingerprinting ----------------
+class ResultFingerprint:
+    """Compact digest of a fetched result set, fed one row at a time."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = 0
+        self.ordered = hashlib.blake2b(digest_size=16)
+        self.unordered = 0
+
+    def add(self, row):
+        encoded = json.dumps(row, default=str, separators=(",", ":")).encode("utf-8")
+        self.rows += 1
+        # Length prefix keeps row boundaries unambiguous in the ordered hash.
+        self.ordered.update(len(encoded).to_bytes(4, "little"))
+        self.ordered.update(encoded)
+        # Summing per-row hashes is order-insensitive but still counts duplicates.
+        row_hash = int.from_bytes(hashlib.blake2b(encoded, digest_size=16).digest(), "little")
+        self.unordered = (self.unordered + row_hash) & ((1 << 128) - 1)
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "columns": self.columns,
+            "ordered": self.ordered.hexdigest(),
+            "unordered": f"{self.unordered:032x}",
+        }
+
+
+def fingerprint_key(source, title, sql):
+    """Identify a query across runs; titles alone repeat (e.g. dashboard panels)."""
+    return f"{source} [{title}] {hashlib.sha1(sql.encode('utf-8')).hexdigest()[:12]}"
+
+
+def load_baseline(path, backend):
+    """Read the fingerprints of a previous run, exiting if they cannot be compared."""
     try:
-        r = requests.get(
-            QUESTDB_REST_URL,
-            params={"query": query, "timings": "true"},
-            timeout=TIMEOUT,
-        )
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except OSError as e:
+        sys.exit(f"❌ Cannot read baseline fingerprints {path}: {e}")
+    except json.JSONDecodeError as e:
+        sys.exit(f"❌ Baseline fingerprints {path} are not valid JSON: {e}")
+
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(queries, dict) or "backend" not in data or not all(
+        isinstance(fp, dict) and {"rows", "columns", "ordered", "unordered"} <= fp.keys()
+        for fp in queries.values()
+    ):
+        sys.exit(f"❌ {path} is not a fingerprint file written by this script")
+    if data["backend"] != backend:
+        sys.exit(f"❌ Baseline fingerprints {path} were recorded with the {data['backend']} backend "
+                 f"but this run uses {backend}; fingerprints from different backends never match")
+    return queries
+
+
+def compare_fingerprints(baseline, current):
+    """Return (key, description) for every query whose result differs from the baseline."""
+    changes = []
+    for key, new in current.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if old["columns"] != new["columns"]:
+            changes.append((key, f"columns {old['columns']} → {new['columns']}"))
+        elif old["rows"] != new["rows"]:
+            changes.append((key, f"row count {old['rows']} → {new['rows']}"))
+        elif old["unordered"] != new["unordered"]:
+            changes.append((key, "row values changed"))
+        elif old["ordered"] != new["ordered"]:
+            changes.append((key, "row order changed"))
+    return changes
+
+
+# ---------------- Query execution ----------------
+# ok:        whether the query succeeded
+# error:     error message when it did not
+# exec_time: server-side execute time in nanoseconds (REST), or the
+#            client-observed round trip when the server reports none (PGWire)
+# wall_ns:   client-observed round trip in nanoseconds, up to and including
+#            decoding the result, comparable across backends
+# rows:      number of rows returned, or None for statements without a result set
+# fingerprint: ResultFingerprint.as_dict() of the result set, when requested
+QueryResult = namedtuple("QueryResult", ["ok", "error", "exec_time", "wall_ns", "rows", "fingerprint"], defaults=[None, None])
+
+
+class RestExecutor:
+    """Execute queries via GET on the HTTP /exec endpoint."""
 
-        text = r.text.strip()
+    name = "rest"
+
+    def __init__(self, base_url):
+        self.url = f"{base_url.rstrip('/')}/exec"
+        self.session = requests.Session()
+
+    def describe(self):
+        return f"QuestDB REST URL: {self.url}"
+
+    def execute(self, query, fingerprint=False):
+        """Execute the query via GET, reading and decoding the full response."""
+        start = time.perf_counter_ns()
+        try:
+            with PROFILER.stage("http"):
+                r = self.session.get(
+                    self.url,
+                    params={"query": query, "timings": "true"},
+                    timeout=TIMEOUT,
+                )
+                text = r.text.strip()
+        except requests.Timeout:
+            return QueryResult(False, f"Timeout after {TIMEOUT[1]}s", None, None)
+        except Exception as e:
+            return QueryResult(False, str(e), None, None)
+
+        # Decoding counts towards the round trip, as PGWire's fetch does.
+        js = None
+        if text:
+            try:
+                with PROFILER.stage("json"):
+                    js = json.loads(text)
+            except json.JSONDecodeError:
+                pass
+        wall_ns = time.perf_counter_ns() - start
 
         if r.status_code != 200:
+            if isinstance(js, dict) and "error" in js:
+                return QueryResult(False, js["error"], None, wall_ns)
+            return QueryResult(False, f"HTTP {r.status_code} {r.reason}: {text or 'No body'}", None, wall_ns)
+
+        if not isinstance(js, dict):
+            return QueryResult(True, None, None, wall_ns)
+        if "error" in js:
+            return QueryResult(False, js["error"], None, wall_ns)
+
+        PROFILER.add_server_time(js.get("timings"), wall_ns)
+        exec_time = js.get("timings", {}).get("execute")
+        rows = len(js["dataset"]) if "dataset" in js else None
+        digest = None
+        if fingerprint and "columns" in js:
+            with PROFILER.stage("fingerprint"):
+                fp = ResultFingerprint(f"{c.get('name')}:{c.get('type')}" for c in js["columns"])
+                for row in js.get("dataset", []):
+                    fp.add(row)
+                digest = fp.as_dict()
+        return QueryResult(True, None, exec_time, wall_ns, rows, digest)
+
+    def close(self):
+        self.session.close()
+
+
+class PgWireExecutor:
+    """Execute queries over PGWire using server-side prepared statements and binary results."""
+
+    name = "pgwire"
+
+    def __init__(self, host, port, user, password, dbname):
+        try:
+            import psycopg
+        except ImportError:
+            sys.exit('❌ The pgwire backend requires psycopg: pip install "psycopg[binary]"')
+        self.psycopg = psycopg
+        self.conninfo = dict(host=host, port=port, user=user, password=password, dbname=dbname)
+        self.conn = None
+        self.timed_out = False
+
+    def describe(self):
+        c = self.conninfo
+        return f"QuestDB PGWire: {c['user']}@{c['host']}:{c['port']}/{c['dbname']}"
+
+    def _connect(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = self.psycopg.connect(
+                **self.conninfo, autocommit=True, connect_timeout=TIMEOUT[0]
+            )
+        return self.conn
+
+    def _cancel(self, conn):
+        """Cancel a query that has run for longer than TIMEOUT[1] seconds."""
+        self.timed_out = True
+        try:
+            conn.cancel()
+        except Exception:
+            pass
+
+    def execute(self, query, fingerprint=False):
+        """Execute the query as a prepared statement, fetching all rows in binary format."""
+        start = time.perf_counter_ns()
+        description = records = None
+        timer = None
+        self.timed_out = False
+        try:
+            conn = self._connect()
+            timer = threading.Timer(TIMEOUT[1], self._cancel, args=(conn,))
+            timer.daemon = True
+            timer.start()
+            with PROFILER.stage("pgwire"), conn.cursor(binary=True) as cur:
+                cur.execute(query, prepare=True)
+                if cur.description is not None:
+                    description = cur.description
+                    records = cur.fetchall()
+        except Exception as e:
+            if isinstance(e, self.psycopg.OperationalError) or self.timed_out:
+                # The connection may be unusable now; reconnect on the next query.
+                self.close()
+            if self.timed_out:
+                return QueryResult(False, f"Timeout after {TIMEOUT[1]}s", None, None)
+            return QueryResult(False, str(e).strip(), None, None)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        wall_ns = time.perf_counter_ns() - start
+
+        rows = len(records) if records is not None else None
+        digest = None
+        if fingerprint and description is not None:
+            with PROFILER.stage("fingerprint"):
+                # Label types by OID: Column.type_display is only public from psycopg 3.2.
+                fp = ResultFingerprint(f"{c.name}:{c.type_code}" for c in description)
+                for row in records:
+                    fp.add(row)
+                digest = fp.as_dict()
+        # PGWire reports no server-side timings, so the round trip stands in for execute time.
+        return QueryResult(True, None, wall_ns, wall_ns, rows, digest)
+
+    def close(self):
+        if self.conn is not None:
             try:
-                js = json.loads(text)
-                if "error" in js:
-                    return False, js["error"], None
+                self.conn.close()
             except Exception:
                 pass
-            return False, f"HTTP {r.status_code} {r.reason}: {text or 'No body'}", None
+            self.conn = None
 
-        if not text:
-            return True, None, None
 
-        try:
-            js = json.loads(text)
-            if "error" in js:
-                return False, js["error"], None
-            exec_time = js.get("timings", {}).get("execute")
-            return True, None, exec_time
-        except json.JSONDecodeError:
-            return True, None, None
-
-    except requests.Timeout:
-        return False, f"Timeout after {TIMEOUT[1]}s", None
-    except Exception as e:
-        return False, str(e), None
+def build_executors(backend):
+    """Return the executors for the chosen backend; the first one drives the report."""
+    executors = []
+    if backend in ("rest", "both"):
+        executors.append(RestExecutor(args.url))
+    if backend in ("pgwire", "both"):
+        executors.append(PgWireExecutor(
+            args.pg_host, args.pg_port, args.pg_user, args.pg_password, args.pg_database
+        ))
+    return executors
 
 # ---------------- Printing ----------------
 def print_timing(exec_ms_cold, exec_ms_hot=None):
@@ -239,98 +573,193 @@ if __name__ == "__main__":
     failed_list = []
     slow_list = []
     very_slow_list = []
+    backend_list = []
+    fingerprints = {}
+
+    executors = build_executors(args.backend)
+    primary = executors[0]
+
+    baseline = {}
+    if args.baseline_fingerprints:
+        baseline = load_baseline(args.baseline_fingerprints, primary.name)
+
+    profile = cProfile.Profile() if args.profile_output else None
+    if profile:
+        profile.enable()
 
     # Collect queries
     blocks = []
     if args.process_local == "yes":
-        blocks.extend(extract_local_blocks(ROOT_DIR))
+        with PROFILER.stage("local scan"):
+            blocks.extend(extract_local_blocks(ROOT_DIR))
     if args.process_demo == "yes":
-        blocks.extend(extract_demo_queries())
+        with PROFILER.stage("demo fetch"):
+            blocks.extend(extract_demo_queries())
     if args.process_dashboards == "yes":
-        blocks.extend(extract_dashboard_queries())
+        with PROFILER.stage("dashboards fetch"):
+            blocks.extend(extract_dashboard_queries())
 
     total = len(blocks)
-    print(f"QuestDB REST URL: {QUESTDB_REST_URL}")
+    for executor in executors:
+        print(executor.describe())
     print(f"Searching in: {Path(ROOT_DIR).resolve()}")
     print(f"Found {total} queries to execute.\n")
 
     with ALL_FILE.open("w", encoding="utf-8") as all_out, FAILED_FILE.open("w", encoding="utf-8") as fail_out:
         for i, (file_path, title, sql) in enumerate(blocks, 1):
-            print(f"[{i}/{total}] Executing: {file_path}  [{title}]")
-            sys.stdout.flush()
-
-            ok, err, exec_time_cold = execute_query(sql)
-            all_out.write(f"-- {file_path}\n--- {title}\n{sql}\n\n")
-
-            if not ok:
-                failed += 1
-                failed_list.append((file_path, title, err))
-                print(f"   ❌ Failed: {err}")
-                fail_out.write(f"-- {file_path}\n--- {title}\n{sql}\n-- ERROR: {err}\n\n")
-                continue
-
-            success += 1
-            if exec_time_cold is not None:
-                exec_ms_cold = exec_time_cold / 1_000_000
-                exec_ms_hot = None
-
-                if exec_ms_cold >= 1000:
-                    ok_hot, err_hot, exec_time_hot = execute_query(sql)
-                    if ok_hot and exec_time_hot is not None:
-                        exec_ms_hot = exec_time_hot / 1_000_000
-                        print_timing(exec_ms_cold, exec_ms_hot)
-                        if exec_ms_hot >= 2500:
-                            very_slow_list.append((file_path, title, exec_ms_cold, exec_ms_hot))
-                        elif exec_ms_hot >= 1000:
-                            slow_list.append((file_path, title, exec_ms_cold, exec_ms_hot))
+            with PROFILER.query(file_path, title):
+                print(f"[{i}/{total}] Executing: {file_path}  [{title}]")
+                sys.stdout.flush()
+
+                results = [
+                    (executor.name, executor.execute(sql, fingerprint=FINGERPRINT and executor is primary))
+                    for executor in executors
+                ]
+                all_out.write(f"-- {file_path}\n--- {title}\n{sql}\n\n")
+
+                errors = [(name, res.error) for name, res in results if not res.ok]
+                if errors:
+                    if len(executors) > 1:
+                        err = "; ".join(f"[{name}] {e}" for name, e in errors)
+                    else:
+                        err = errors[0][1]
+                    failed += 1
+                    failed_list.append((file_path, title, err))
+                    print(f"   ❌ Failed: {err}")
+                    fail_out.write(f"-- {file_path}\n--- {title}\n{sql}\n-- ERROR: {err}\n\n")
+                    continue
+
+                success += 1
+                if len(executors) > 1:
+                    walls = {name: res.wall_ns / 1_000_000 for name, res in results}
+                    rows = {name: res.rows for name, res in results}
+                    line = "   ↔  Round trip: " + ", ".join(f"{name}: {ms:.3f} ms" for name, ms in walls.items())
+                    if len(set(rows.values())) > 1:
+                        line += "  ⚠️  row counts differ: " + ", ".join(f"{name}={n}" for name, n in rows.items())
+                    print(line)
+                    backend_list.append((file_path, title, walls, rows))
+
+                if results[0][1].fingerprint is not None:
+                    fingerprints[fingerprint_key(file_path, title, sql)] = results[0][1].fingerprint
+
+                exec_time_cold = results[0][1].exec_time
+                if exec_time_cold is not None:
+                    exec_ms_cold = exec_time_cold / 1_000_000
+                    exec_ms_hot = None
+
+                    if exec_ms_cold >= 1000:
+                        ok_hot, err_hot, exec_time_hot = primary.execute(sql)[:3]
+                        if ok_hot and exec_time_hot is not None:
+                            exec_ms_hot = exec_time_hot / 1_000_000
+                            print_timing(exec_ms_cold, exec_ms_hot)
+                            if exec_ms_hot >= 2500:
+                                very_slow_list.append((file_path, title, exec_ms_cold, exec_ms_hot))
+                            elif exec_ms_hot >= 1000:
+                                slow_list.append((file_path, title, exec_ms_cold, exec_ms_hot))
+                        else:
+                            print_timing(exec_ms_cold)
+                            if exec_ms_cold >= 2500:
+                                very_slow_list.append((file_path, title, exec_ms_cold, None))
+                            elif exec_ms_cold >= 1000:
+                                slow_list.append((file_path, title, exec_ms_cold, None))
                     else:
                         print_timing(exec_ms_cold)
-                        if exec_ms_cold >= 2500:
-                            very_slow_list.append((file_path, title, exec_ms_cold, None))
-                        elif exec_ms_cold >= 1000:
-                            slow_list.append((file_path, title, exec_ms_cold, None))
                 else:
-                    print_timing(exec_ms_cold)
-            else:
-                print("   ✅ Success")
+                    print("   ✅ Success")
 
-    # ---------- Summary report ----------
-    report_lines = []
-    report_lines.append("============================")
-    report_lines.append(f"Executed {total} queries")
-    report_lines.append(f"✅  Succeeded: {success}")
-    report_lines.append(f"❌  Failed:    {failed}")
-    report_lines.append("============================\n")
-
-    if failed_list:
-        report_lines.append("❌ Failed queries:")
-        for path, title, err in failed_list:
-            report_lines.append(f"  - {path}  [{title}]: {err}")
-        report_lines.append("")
-
-    if very_slow_list:
-        report_lines.append("🔥 Very slow queries (≥ 2.5 s hot run):")
-        for path, title, cold, hot in very_slow_list:
-            if hot is not None:
-                report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms, hot={hot:.3f} ms")
-            else:
-                report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms")
-        report_lines.append("")
-
-    if slow_list:
-        report_lines.append("⚠️  Slow queries (1–2.5 s hot run):")
-        for path, title, cold, hot in slow_list:
-            if hot is not None:
-                report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms, hot={hot:.3f} ms")
-            else:
-                report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms")
-        report_lines.append("")
-
-    report_lines.append("Results written to:")
-    report_lines.append(f"  • {ALL_FILE}")
-    report_lines.append(f"  • {FAILED_FILE}")
-    report_lines.append(f"  • {REPORT_FILE}")
+    for executor in executors:
+        executor.close()
 
-    final_report = "\n".join(report_lines)
-    print("\n" + final_report)
-    REPORT_FILE.write_text(final_report, encoding="utf-8")
+    # ---------- Summary report ----------
+    with PROFILER.stage("report"):
+        report_lines = []
+        report_lines.append("============================")
+        report_lines.append(f"Executed {total} queries")
+        report_lines.append(f"✅  Succeeded: {success}")
+        report_lines.append(f"❌  Failed:    {failed}")
+        report_lines.append("============================\n")
+
+        if failed_list:
+            report_lines.append("❌ Failed queries:")
+            for path, title, err in failed_list:
+                report_lines.append(f"  - {path}  [{title}]: {err}")
+            report_lines.append("")
+
+        if very_slow_list:
+            report_lines.append("🔥 Very slow queries (≥ 2.5 s hot run):")
+            for path, title, cold, hot in very_slow_list:
+                if hot is not None:
+                    report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms, hot={hot:.3f} ms")
+                else:
+                    report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms")
+            report_lines.append("")
+
+        if slow_list:
+            report_lines.append("⚠️  Slow queries (1–2.5 s hot run):")
+            for path, title, cold, hot in slow_list:
+                if hot is not None:
+                    report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms, hot={hot:.3f} ms")
+                else:
+                    report_lines.append(f"  - {path}  [{title}] cold={cold:.3f} ms")
+            report_lines.append("")
+
+        mismatches = [(path, title, rows) for path, title, _, rows in backend_list if len(set(rows.values())) > 1]
+        if backend_list:
+            names = [executor.name for executor in executors]
+            totals = {name: sum(walls[name] for _, _, walls, _ in backend_list) for name in names}
+            report_lines.append("↔  Round trip per backend (succeeded queries, client-observed):")
+            report_lines.append("  Total: " + ", ".join(f"{name}={totals[name]:.3f} ms" for name in names))
+            for path, title, walls, rows in backend_list:
+                report_lines.append(
+                    f"  - {path}  [{title}] " + ", ".join(f"{name}={walls[name]:.3f} ms" for name in names)
+                    + "  rows: " + ", ".join(f"{name}={rows[name]}" for name in names)
+                )
+            report_lines.append("")
+
+        if mismatches:
+            report_lines.append("⚠️  Row counts differ between backends:")
+            for path, title, rows in mismatches:
+                report_lines.append(f"  - {path}  [{title}] " + ", ".join(f"{name}={n}" for name, n in rows.items()))
+            report_lines.append("")
+
+        if FINGERPRINT:
+            FINGERPRINT_FILE.write_text(json.dumps({
+                "backend": primary.name,
+                "target": primary.describe(),
+                "queries": fingerprints,
+            }, indent=2, ensure_ascii=False), encoding="utf-8")
+
+        if args.baseline_fingerprints:
+            changes = compare_fingerprints(baseline, fingerprints)
+            compared = sum(1 for key in fingerprints if key in baseline)
+            report_lines.append(f"🧬 Result changes vs {args.baseline_fingerprints} "
+                                f"({compared} queries compared, {len(changes)} changed):")
+            if not compared:
+                report_lines.append("  No queries in common with the baseline.")
+            for key, change in changes:
+                report_lines.append(f"  - {key}: {change}")
+            report_lines.append("")
+
+        report_lines.append("Results written to:")
+        report_lines.append(f"  • {ALL_FILE}")
+        report_lines.append(f"  • {FAILED_FILE}")
+        report_lines.append(f"  • {REPORT_FILE}")
+        if FINGERPRINT:
+            report_lines.append(f"  • {FINGERPRINT_FILE}")
+        if PROFILER.enabled:
+            report_lines.append(f"  • {PROFILE_FILE}")
+        if args.profile_output:
+            report_lines.append(f"  • {args.profile_output}")
+
+        final_report = "\n".join(report_lines)
+        print("\n" + final_report)
+        REPORT_FILE.write_text(final_report, encoding="utf-8")
+
+    if profile:
+        profile.disable()
+        profile.dump_stats(args.profile_output)
+
+    if PROFILER.enabled:
+        summary_lines = PROFILER.summary_lines()
+        print("\n" + "\n".join(summary_lines))
+        PROFILE_FILE.write_text("\n".join(summary_lines + [""] + PROFILER.query_lines()), encoding="utf-8")